@@ -65,9 +65,14 @@ def _serialize_bool(bool_value: bool) -> str:
     return str(bool_value)
 
 
+# Accepts the same values as distutils.util.strtobool, which is not available in python 3.12+.
 def _deserialize_bool(s) -> bool:
-    from distutils.util import strtobool
-    return strtobool(s) == 1
+    s = s.lower()
+    if s in ('y', 'yes', 't', 'true', 'on', '1'):
+        return True
+    if s in ('n', 'no', 'f', 'false', 'off', '0'):
+        return False
+    raise ValueError('Invalid truth value: "{}"'.format(s))
 
 
 _bool_deserializer_definitions = inspect.getsource(_deserialize_bool)
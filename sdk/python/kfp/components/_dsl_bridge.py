@@ -17,6 +17,7 @@ from collections import OrderedDict
 from typing import Mapping
 from ._structures import ContainerImplementation, ConcatPlaceholder, IfPlaceholder, InputValuePlaceholder, InputPathPlaceholder, IsPresentPlaceholder, OutputPathPlaceholder, TaskSpec
 from ._components import _generate_input_file_name, _generate_output_file_name, _default_component_name
+from ._data_passing import _deserialize_bool
 
 def create_container_op_from_task(task_spec: TaskSpec):
     argument_values = task_spec.arguments
@@ -91,8 +92,7 @@ def create_container_op_from_task(task_spec: TaskSpec):
         elif isinstance(arg, IfPlaceholder):
             arg = arg.if_structure
             condition_result = expand_command_part(arg.condition)
-            from distutils.util import strtobool
-            condition_result_bool = condition_result and strtobool(condition_result) #Python gotcha: bool('False') == True; Need to use strtobool; Also need to handle None and []
+            condition_result_bool = condition_result and _deserialize_bool(condition_result) #Python gotcha: bool('False') == True; Need to parse the string; Also need to handle None and []
             result_node = arg.then_value if condition_result_bool else arg.else_value
             if result_node is None:
                 return []
@@ -31,11 +31,28 @@ from ._data_passing import serialize_value, type_name_to_deserializer, type_name
 from ._naming import _make_name_unique_by_adding_index
 from ._structures import *
 
+from collections import OrderedDict
+import copy
+import functools
+import importlib.util
 import inspect
-from pathlib import Path
+import itertools
+import os
+import pickle
+import pickletools
+import re
+import sys
+import sysconfig
+import threading
 import typing
+import weakref
 from typing import Callable, Generic, List, TypeVar, Union
 
+try:
+    import pybase64 as _base64 # Drop-in replacement for base64 that uses the SIMD-accelerated encoder when available
+except ImportError:
+    import base64 as _base64 # Backed by the binascii C encoder
+
 T = TypeVar('T')
 
 
@@ -80,6 +97,11 @@ class OutputBinaryFile:
         self.type = type
 
 
+_input_passing_styles = (InputPath, InputTextFile, InputBinaryFile)
+_output_passing_styles = (OutputPath, OutputTextFile, OutputBinaryFile)
+_file_passing_styles = _input_passing_styles + _output_passing_styles
+
+
 def _make_parent_dirs_and_return_path(file_path: str):
     import os
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
@@ -94,6 +116,28 @@ def _parent_dirs_maker_that_returns_open_file(mode: str, encoding: str = None):
     return make_parent_dirs_and_return_path
 
 
+# The source code of these definitions is included in the generated programs. inspect.getsource is slow, so it's only called once.
+_passing_style_to_definition = {
+    passing_style: inspect.getsource(passing_style)
+    for passing_style in _file_passing_styles
+}
+_helper_func_to_definition = {
+    helper_func: inspect.getsource(helper_func)
+    for helper_func in [_make_parent_dirs_and_return_path, _parent_dirs_maker_that_returns_open_file]
+}
+
+# Argparse types for the data passing styles along with the helper functions (if any) that the types need in the generated program.
+# For Output* we cannot use the build-in argparse.FileType objects since they do not create parent directories.
+_passing_style_to_argparse_type_and_helper_func = {
+    InputPath: ('str', None),
+    InputTextFile: ("argparse.FileType('rt')", None),
+    InputBinaryFile: ("argparse.FileType('rb')", None),
+    OutputPath: (_make_parent_dirs_and_return_path.__name__, _make_parent_dirs_and_return_path), # ~= 'str'
+    OutputTextFile: (_parent_dirs_maker_that_returns_open_file.__name__ + "('wt')", _parent_dirs_maker_that_returns_open_file), # ~= "argparse.FileType('wt')"
+    OutputBinaryFile: (_parent_dirs_maker_that_returns_open_file.__name__ + "('wb')", _parent_dirs_maker_that_returns_open_file), # ~= "argparse.FileType('wb')"
+}
+
+
 #TODO: Replace this image name with another name once people decide what to replace it with.
 _default_base_image='tensorflow/tensorflow:1.13.2-py3'
 
@@ -110,38 +154,15 @@ def set_default_base_image(image_or_factory: Union[str, Callable[[], str]]):
     _default_base_image = image_or_factory
 
 
-def _python_function_name_to_component_name(name):
-    import re
-    return re.sub(' +', ' ', name.replace('_', ' ')).strip(' ').capitalize()
+_multiple_spaces_regex = re.compile(' +')
 
 
-def _capture_function_code_using_cloudpickle(func, modules_to_capture: List[str] = None) -> str:
-    import base64
-    import sys
-    import cloudpickle
-    import pickle
+def _python_function_name_to_component_name(name):
+    return _multiple_spaces_regex.sub(' ', name.replace('_', ' ')).strip(' ').capitalize()
 
-    if modules_to_capture is None:
-        modules_to_capture = [func.__module__]
 
-    # Hack to force cloudpickle to capture the whole function instead of just referencing the code file. See https://github.com/cloudpipe/cloudpickle/blob/74d69d759185edaeeac7bdcb7015cfc0c652f204/cloudpickle/cloudpickle.py#L490
-    old_modules = {}
-    old_sig = getattr(func, '__signature__', None)
-    try: # Try is needed to restore the state if something goes wrong
-        for module_name in modules_to_capture:
-            if module_name in sys.modules:
-                old_modules[module_name] = sys.modules.pop(module_name)
-        # Hack to prevent cloudpickle from trying to pickle generic types that might be present in the signature. See https://github.com/cloudpipe/cloudpickle/issues/196 
-        # Currently the __signature__ is only set by Airflow components as a means to spoof/pass the function signature to _func_to_component_spec
-        if hasattr(func, '__signature__'):
-            del func.__signature__
-        func_pickle = base64.b64encode(cloudpickle.dumps(func, pickle.DEFAULT_PROTOCOL))
-    finally:
-        sys.modules.update(old_modules)
-        if old_sig:
-            func.__signature__ = old_sig
-
-    function_loading_code = '''\
+# The part of the function loading code that does not depend on the function. Only the pickler python version varies and it's fixed for the process.
+_cloudpickle_function_loading_code_prefix = '''\
 import sys
 try:
     import cloudpickle as _cloudpickle
@@ -176,19 +197,101 @@ if current_python_version != pickler_python_version:
 import base64
 import pickle
 
-{func_name} = pickle.loads(base64.b64decode({func_pickle}))
 '''.format(
-        func_name=func.__name__,
-        func_pickle=repr(func_pickle),
-        pickler_python_version=repr(tuple(sys.version_info)),
-    )
+    pickler_python_version=repr(tuple(sys.version_info)),
+)
+
+
+_cloudpickle_capture_lock = threading.Lock()
+
+
+def _capture_function_code_using_cloudpickle(func, modules_to_capture: List[str] = None) -> str:
+    import cloudpickle # Imported lazily since it's only needed for code pickling
+
+    if modules_to_capture is None:
+        modules_to_capture = [func.__module__]
+
+    # cloudpickle 2.0+ can be asked to capture the module members by value instead of just referencing the code file.
+    # Older versions need a hack that temporarily removes the modules from sys.modules. See https://github.com/cloudpipe/cloudpickle/blob/74d69d759185edaeeac7bdcb7015cfc0c652f204/cloudpickle/cloudpickle.py#L490
+    can_register_pickle_by_value = hasattr(cloudpickle, 'register_pickle_by_value')
+    # The module registration (or removal from sys.modules) is process-wide state, so concurrent captures must not interleave.
+    # Otherwise one thread can unregister a module while another thread is still pickling its members.
+    with _cloudpickle_capture_lock:
+        registered_modules = []
+        old_modules = {}
+        old_sig = getattr(func, '__signature__', None)
+        try: # Try is needed to restore the state if something goes wrong
+            for module_name in modules_to_capture:
+                if module_name in sys.modules:
+                    if can_register_pickle_by_value:
+                        if module_name not in cloudpickle.list_registry_pickle_by_value():
+                            module = sys.modules[module_name]
+                            cloudpickle.register_pickle_by_value(module)
+                            registered_modules.append(module)
+                    else:
+                        old_modules[module_name] = sys.modules.pop(module_name)
+            # Hack to prevent cloudpickle from trying to pickle generic types that might be present in the signature. See https://github.com/cloudpipe/cloudpickle/issues/196 
+            # Currently the __signature__ is only set by Airflow components as a means to spoof/pass the function signature to _func_to_component_spec
+            if hasattr(func, '__signature__'):
+                del func.__signature__
+            # The loading code below refuses to run on python versions older than the pickler's one, so the highest protocol is always supported at load time.
+            # Protocol 5 (python 3.8+) writes the data of buffer-backed objects (e.g. numpy arrays) without making intermediate copies.
+            func_pickle_bytes = cloudpickle.dumps(func, pickle.HIGHEST_PROTOCOL)
+            # Removes the unused PUT opcodes to make the pickle (which is embedded in the component) smaller.
+            # pickletools.optimize is several times slower on python 3.14+, so there it only runs when KFP_OPTIMIZE_PICKLE is set.
+            if sys.version_info < (3, 14) or os.environ.get('KFP_OPTIMIZE_PICKLE'):
+                func_pickle_bytes = pickletools.optimize(func_pickle_bytes)
+            func_pickle = _base64.b64encode(func_pickle_bytes)
+        finally:
+            for module in registered_modules:
+                cloudpickle.unregister_pickle_by_value(module)
+            sys.modules.update(old_modules)
+            if old_sig:
+                func.__signature__ = old_sig
+
+    function_loading_code = _cloudpickle_function_loading_code_prefix + func.__name__ + ' = pickle.loads(base64.b64decode(' + repr(func_pickle) + '))\n'
 
     return function_loading_code
 
 
-def _capture_function_code_using_source_copy(func) -> str:	
-    import inspect	
+# Captured function source code keyed by the code location. Functions created from the same code (e.g. closures created by a factory) share the entry.
+# The entries also hold the modification time of the file, so that edited files are read again and the entry is replaced.
+# Code that does not come from a real file is not cached, since its pseudo file name can be reused with a different source (e.g. notebook cells).
+_function_source_code_cache = {}
+
 
+def _get_function_code_location_and_file_mtime(func):
+    code = getattr(inspect.unwrap(func), '__code__', None) # inspect.getsourcelines also unwraps the decorated functions
+    if code is None:
+        return (None, None)
+    try:
+        file_mtime = os.stat(code.co_filename).st_mtime_ns
+    except OSError: # The code does not come from a real file (e.g. it was defined in a notebook cell)
+        file_mtime = None
+    return ((code.co_filename, code.co_firstlineno), file_mtime)
+
+
+def _capture_function_code_using_source_copy(func, signature: inspect.Signature = None) -> str:
+    (code_location, file_mtime) = _get_function_code_location_and_file_mtime(func)
+    if file_mtime is None:
+        func_code = _read_function_source_code(func)
+    else:
+        (cached_file_mtime, func_code) = _function_source_code_cache.get(code_location, (None, None))
+        if func_code is None or cached_file_mtime != file_mtime:
+            func_code = _read_function_source_code(func)
+            _function_source_code_cache[code_location] = (file_mtime, func_code)
+
+    #TODO: Add support for copying the NamedTuple subclass declaration code
+    #Adding NamedTuple import if needed
+    if signature is None:
+        signature = inspect.signature(func)
+    if hasattr(signature.return_annotation, '_fields'): #NamedTuple
+        func_code = 'from typing import NamedTuple\n\n' + func_code
+
+    return func_code
+
+
+def _read_function_source_code(func) -> str:
     #Source code can include decorators line @python_op. Remove them
     (func_code_lines, _) = inspect.getsourcelines(func)
     while func_code_lines[0].lstrip().startswith('@'): #decorator
@@ -200,24 +303,26 @@ def _capture_function_code_using_source_copy(func) -> str:
     indent = len(first_line) - len(first_line.lstrip())
     func_code_lines = [line[indent:] for line in func_code_lines]
 
-    #TODO: Add support for copying the NamedTuple subclass declaration code
-    #Adding NamedTuple import if needed
-    if hasattr(inspect.signature(func).return_annotation, '_fields'): #NamedTuple
-        func_code_lines.insert(0, '\n')
-        func_code_lines.insert(0, 'from typing import NamedTuple\n')
-
     return ''.join(func_code_lines) #Lines retain their \n endings
 
 
-def _extract_component_interface(func) -> ComponentSpec:
+# Keyed by id() since annotations are not always hashable. The types are kept alive by type_to_type_name, so the ids are stable.
+_type_id_to_type_name = {id(typ): type_name for typ, type_name in type_to_type_name.items() if isinstance(typ, type)}
+
+
+def _extract_component_interface(func, signature: inspect.Signature = None) -> ComponentSpec:
     single_output_name_const = 'Output'
 
-    signature = inspect.signature(func)
+    if signature is None:
+        signature = inspect.signature(func)
     parameters = list(signature.parameters.values())
     inputs = []
     outputs = []
 
     def annotation_to_type_struct(annotation):
+        type_name = _type_id_to_type_name.get(id(annotation)) # Fast path for the common types like int or str
+        if type_name is not None:
+            return type_name
         if not annotation or annotation == inspect.Parameter.empty:
             return None
         if isinstance(annotation, type):
@@ -239,7 +344,7 @@ def _extract_component_interface(func) -> ComponentSpec:
         parameter_annotation = parameter.annotation
         passing_style = None
         io_name = parameter.name
-        if isinstance(parameter_annotation, (InputPath, InputTextFile, InputBinaryFile, OutputPath, OutputTextFile, OutputBinaryFile)):
+        if isinstance(parameter_annotation, _file_passing_styles):
             passing_style = type(parameter_annotation)
             parameter_annotation = parameter_annotation.type
             if parameter.default is not inspect.Parameter.empty:
@@ -256,7 +361,7 @@ def _extract_component_interface(func) -> ComponentSpec:
         type_struct = annotation_to_type_struct(parameter_annotation)
         #TODO: Humanize the input/output names
 
-        if isinstance(parameter.annotation, (OutputPath, OutputTextFile, OutputBinaryFile)):
+        if isinstance(parameter.annotation, _output_passing_styles):
             io_name = _make_name_unique_by_adding_index(io_name, output_names, '_')
             output_names.add(io_name)
             output_spec = OutputSpec(
@@ -325,6 +430,34 @@ def _extract_component_interface(func) -> ComponentSpec:
     return component_spec
 
 
+# Fixed parts of the generated program. The program is assembled from sections separated by blank lines.
+_outputs_to_list_code = '''\
+if not hasattr(_outputs, '__getitem__') or isinstance(_outputs, str):
+    _outputs = [_outputs]
+'''
+
+_outputs_writing_code = '''\
+import os
+for idx, output_file in enumerate(_output_files):
+    try:
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    except OSError:
+        pass
+    with open(output_file, 'w') as f:
+        f.write(_output_serializers[idx](_outputs[idx]))
+'''
+
+_consecutive_blank_lines_regex = re.compile('\n\n\n+')
+
+
+@functools.lru_cache(maxsize=None)
+def _get_serializer_definition(serializer_func) -> str:
+    # If serializer is not part of the standard python library, then include its code in the generated program
+    if hasattr(serializer_func, '__module__') and not _module_is_builtin_or_standard(serializer_func.__module__):
+        return inspect.getsource(serializer_func)
+    return None
+
+
 def _func_to_component_spec(func, extra_code='', base_image : str = None, packages_to_install: List[str] = None, modules_to_capture: List[str] = None, use_code_pickling=False) -> ComponentSpec:
     '''Takes a self-contained python function and converts it to component
 
@@ -351,7 +484,8 @@ def _func_to_component_spec(func, extra_code='', base_image : str = None, packag
 
     packages_to_install = packages_to_install or []
 
-    component_spec = _extract_component_interface(func)
+    signature = inspect.signature(func)
+    component_spec = _extract_component_interface(func, signature)
 
     arguments = []
     arguments.extend(InputValuePlaceholder(input.name) for input in component_spec.inputs)
@@ -362,52 +496,36 @@ def _func_to_component_spec(func, extra_code='', base_image : str = None, packag
         # pip startup is quite slow. TODO: Remove the special cloudpickle installation code in favor of the the following line once a way to speed up pip startup is discovered.
         #packages_to_install.append('cloudpickle==1.1.1')
     else:
-        func_code = _capture_function_code_using_source_copy(func)
+        func_code = _capture_function_code_using_source_copy(func, signature)
 
-    definitions = set()
+    # The definitions are keyed by the name they define. OrderedDict makes the generated code deterministic.
+    definitions = OrderedDict()
     def get_deserializer_and_register_definitions(type_name):
         if type_name in type_name_to_deserializer:
             (deserializer_code_str, definition_str) = type_name_to_deserializer[type_name]
             if definition_str:
-                definitions.add(definition_str)
+                definitions.setdefault(deserializer_code_str, definition_str)
             return deserializer_code_str
         return 'str'
 
-    pre_func_definitions = set()
+    pre_func_definitions = OrderedDict()
     def get_argparse_type_for_input_file(passing_style):
         if passing_style is None:
             return None
-        pre_func_definitions.add(inspect.getsource(passing_style))
-
-        if passing_style is InputPath:
-            return 'str'
-        elif passing_style is InputTextFile:
-            return "argparse.FileType('rt')"
-        elif passing_style is InputBinaryFile:
-            return "argparse.FileType('rb')"
-        # For Output* we cannot use the build-in argparse.FileType objects since they do not create parent directories.
-        elif passing_style is OutputPath:
-            # ~= return 'str'
-            pre_func_definitions.add(inspect.getsource(_make_parent_dirs_and_return_path))
-            return _make_parent_dirs_and_return_path.__name__
-        elif passing_style is OutputTextFile:
-            # ~= return "argparse.FileType('wt')"
-            pre_func_definitions.add(inspect.getsource(_parent_dirs_maker_that_returns_open_file))
-            return _parent_dirs_maker_that_returns_open_file.__name__ + "('wt')"
-        elif passing_style is OutputBinaryFile:
-            # ~= return "argparse.FileType('wb')"
-            pre_func_definitions.add(inspect.getsource(_parent_dirs_maker_that_returns_open_file))
-            return _parent_dirs_maker_that_returns_open_file.__name__ + "('wb')"
-        raise NotImplementedError('Unexpected data passing style: "{}".'.format(str(passing_style)))
+        if passing_style not in _passing_style_to_argparse_type_and_helper_func:
+            raise NotImplementedError('Unexpected data passing style: "{}".'.format(str(passing_style)))
+        (argparse_type, helper_func) = _passing_style_to_argparse_type_and_helper_func[passing_style]
+        pre_func_definitions.setdefault(passing_style.__name__, _passing_style_to_definition[passing_style])
+        if helper_func:
+            pre_func_definitions.setdefault(helper_func.__name__, _helper_func_to_definition[helper_func])
+        return argparse_type
 
     def get_serializer_and_register_definitions(type_name) -> str:
         if type_name in type_name_to_serializer:
             serializer_func = type_name_to_serializer[type_name]
-            # If serializer is not part of the standard python library, then include its code in the generated program
-            if hasattr(serializer_func, '__module__') and not _module_is_builtin_or_standard(serializer_func.__module__):
-                import inspect
-                serializer_code_str = inspect.getsource(serializer_func)
-                definitions.add(serializer_code_str)
+            serializer_code_str = _get_serializer_definition(serializer_func)
+            if serializer_code_str:
+                definitions.setdefault(serializer_func.__name__, serializer_code_str)
             return serializer_func.__name__
         return 'str'
 
@@ -421,7 +539,7 @@ def _func_to_component_spec(func, extra_code='', base_image : str = None, packag
     outputs_passed_through_func_return_tuple = [output for output in (component_spec.outputs or []) if output._passing_style is None]
     file_outputs_passed_using_func_parameters = [output for output in (component_spec.outputs or []) if output._passing_style is not None]
     arguments = []
-    for input in component_spec.inputs + file_outputs_passed_using_func_parameters:
+    for input in itertools.chain(component_spec.inputs, file_outputs_passed_using_func_parameters):
         param_flag = "--" + input.name.replace("_", "-")
         is_required = isinstance(input, OutputSpec) or not input.optional
         line = '_parser.add_argument("{param_flag}", dest="{param_var}", type={param_type}, required={is_required}, default=argparse.SUPPRESS)'.format(
@@ -432,9 +550,9 @@ def _func_to_component_spec(func, extra_code='', base_image : str = None, packag
         )
         arg_parse_code_lines.append(line)
 
-        if input._passing_style in [InputPath, InputTextFile, InputBinaryFile]:
+        if input._passing_style in _input_passing_styles:
             arguments_for_input = [param_flag, InputPathPlaceholder(input.name)]
-        elif input._passing_style in [OutputPath, OutputTextFile, OutputBinaryFile]:
+        elif input._passing_style in _output_passing_styles:
             arguments_for_input = [param_flag, OutputPathPlaceholder(input.name)]
         else:
             arguments_for_input = [param_flag, InputValuePlaceholder(input.name)]
@@ -468,54 +586,26 @@ def _func_to_component_spec(func, extra_code='', base_image : str = None, packag
         serializer_call_str = get_serializer_and_register_definitions(output.type)
         output_serialization_expression_strings.append(serializer_call_str)
 
-    pre_func_code = '\n'.join(list(pre_func_definitions))
-
-    arg_parse_code_lines = list(definitions) + arg_parse_code_lines
+    pre_func_code = '\n'.join(pre_func_definitions.values())
 
     arg_parse_code_lines.extend([
         '_parsed_args = vars(_parser.parse_args())',
         '_output_files = _parsed_args.pop("_output_paths", [])',
     ])
 
-    full_source = \
-'''\
-{pre_func_code}
-
-{extra_code}
-
-{func_code}
-
-{arg_parse_code}
-
-_outputs = {func_name}(**_parsed_args)
-
-if not hasattr(_outputs, '__getitem__') or isinstance(_outputs, str):
-    _outputs = [_outputs]
-
-_output_serializers = [
-    {output_serialization_code}
-]
-
-import os
-for idx, output_file in enumerate(_output_files):
-    try:
-        os.makedirs(os.path.dirname(output_file))
-    except OSError:
-        pass
-    with open(output_file, 'w') as f:
-        f.write(_output_serializers[idx](_outputs[idx]))
-'''.format(
-        func_name=func.__name__,
-        func_code=func_code,
-        pre_func_code=pre_func_code,
-        extra_code=extra_code,
-        arg_parse_code='\n'.join(arg_parse_code_lines),
-        output_serialization_code=',\n    '.join(output_serialization_expression_strings),
-    )
+    full_source = '\n\n'.join([
+        pre_func_code,
+        extra_code,
+        func_code,
+        '\n'.join(itertools.chain(definitions.values(), arg_parse_code_lines)),
+        '_outputs = ' + func.__name__ + '(**_parsed_args)',
+        _outputs_to_list_code,
+        '_output_serializers = [' + ','.join('\n    ' + expression for expression in output_serialization_expression_strings) + '\n]', # No whitespace-only lines that would prevent the YAML literal style
+        _outputs_writing_code,
+    ])
 
     #Removing consecutive blank lines
-    import re
-    full_source = re.sub('\n\n\n+', '\n\n', full_source).strip('\n') + '\n'
+    full_source = _consecutive_blank_lines_regex.sub('\n\n', full_source).strip('\n') + '\n'
 
     package_preinstallation_command = []
     if packages_to_install:
@@ -533,8 +623,78 @@ for idx, output_file in enumerate(_output_files):
     return component_spec
 
 
+# Component specs created from functions, keyed by the function and then by the conversion options. Weak keys let the functions be garbage-collected.
+_component_spec_cache = weakref.WeakKeyDictionary()
+
+
+def _get_function_state(func) -> tuple:
+    # The function can be changed in place (e.g. IPython autoreload replaces __code__), so the cached specs are only reused while these attributes stay the same.
+    unwrapped_func = inspect.unwrap(func)
+    return (
+        getattr(unwrapped_func, '__code__', None),
+        getattr(unwrapped_func, '__defaults__', None),
+        getattr(unwrapped_func, '__kwdefaults__', None),
+        getattr(func, '__doc__', None),
+        getattr(func, '__name__', None),
+        getattr(func, '__signature__', None),
+    )
+
+
+def _func_to_component_spec_cached(func, extra_code='', base_image : str = None, packages_to_install: List[str] = None, modules_to_capture: List[str] = None, use_code_pickling=False) -> ComponentSpec:
+    '''Same as _func_to_component_spec, but reuses the component spec when the same function is converted again with the same options.
+    Every call returns a separate copy of the cached ComponentSpec, so the callers can modify it.
+    '''
+    # Pickled code captures the current values of the global variables, so it's not cached.
+    # Base image factories are not cached either since they may produce a different image every time.
+    effective_base_image = base_image or getattr(func, '_component_base_image', None) or _default_base_image
+    if use_code_pickling or isinstance(effective_base_image, Callable):
+        return _func_to_component_spec(
+            func=func,
+            extra_code=extra_code,
+            base_image=base_image,
+            packages_to_install=packages_to_install,
+            modules_to_capture=modules_to_capture,
+            use_code_pickling=use_code_pickling,
+        )
+
+    cache_key = (
+        extra_code,
+        base_image,
+        _default_base_image,
+        tuple(packages_to_install or []),
+        # The @python_component decorator can set or change these function attributes at any time
+        getattr(func, '_component_human_name', None),
+        getattr(func, '_component_description', None),
+        getattr(func, '_component_base_image', None),
+    )
+    try:
+        specs_for_func = _component_spec_cache.setdefault(func, {})
+    except TypeError: # The callable cannot be weakly referenced
+        specs_for_func = {}
+    # The attributes are compared by identity since their values are not always hashable or comparable.
+    # The source file modification time is checked too, since the function code is read from the file.
+    func_state = _get_function_state(func)
+    (_, file_mtime) = _get_function_code_location_and_file_mtime(func)
+    (cached_func_state, cached_file_mtime, component_spec) = specs_for_func.get(cache_key, (None, None, None))
+    if (
+        component_spec is None
+        or cached_file_mtime != file_mtime
+        or any(value is not cached_value for value, cached_value in zip(func_state, cached_func_state))
+    ):
+        component_spec = _func_to_component_spec(
+            func=func,
+            extra_code=extra_code,
+            base_image=base_image,
+            packages_to_install=packages_to_install,
+            modules_to_capture=modules_to_capture,
+            use_code_pickling=use_code_pickling,
+        )
+        specs_for_func[cache_key] = (func_state, file_mtime, component_spec)
+    return copy.deepcopy(component_spec)
+
+
 def _func_to_component_dict(func, extra_code='', base_image: str = None, packages_to_install: List[str] = None, modules_to_capture: List[str] = None, use_code_pickling=False):
-    return _func_to_component_spec(
+    return _func_to_component_spec_cached(
         func=func,
         extra_code=extra_code,
         base_image=base_image,
@@ -579,6 +739,16 @@ def func_to_component_text(func, extra_code='', base_image: str = None, packages
     return dump_yaml(component_dict)
 
 
+def _write_component_spec_to_file(component_spec: ComponentSpec, output_component_file: str) -> None:
+    # The YAML is only produced here, when the component file is actually requested. Creating the task factory only needs the ComponentSpec.
+    component_dict = component_spec.to_dict()
+    # The YAML is fully produced before the file is opened, so a failure cannot destroy an existing component file or leave a partially written one.
+    # The emitter encodes the YAML directly, so the file is written in binary mode without another text encoding layer.
+    component_yaml = dump_yaml(component_dict, encoding='utf-8')
+    with open(output_component_file, 'wb') as component_file:
+        component_file.write(component_yaml)
+
+
 def func_to_component_file(func, output_component_file, base_image: str = None, extra_code='', packages_to_install: List[str] = None, modules_to_capture: List[str] = None, use_code_pickling=False) -> None:
     '''
     Converts a Python function to a component definition and writes it to a file
@@ -602,7 +772,7 @@ def func_to_component_file(func, output_component_file, base_image: str = None,
         use_code_pickling: Specifies whether the function code should be captured using pickling as opposed to source code manipulation. Pickling has better support for capturing dependencies, but is sensitive to version mismatch between python in component creation environment and runtime image.
     '''
 
-    component_yaml = func_to_component_text(
+    component_spec = _func_to_component_spec_cached(
         func=func,
         extra_code=extra_code,
         base_image=base_image,
@@ -610,8 +780,8 @@ def func_to_component_file(func, output_component_file, base_image: str = None,
         modules_to_capture=modules_to_capture,
         use_code_pickling=use_code_pickling,
     )
-    
-    Path(output_component_file).write_text(component_yaml)
+
+    _write_component_spec_to_file(component_spec, output_component_file)
 
 
 def func_to_container_op(func, output_component_file=None, base_image: str = None, extra_code='', packages_to_install: List[str] = None, modules_to_capture: List[str] = None, use_code_pickling=False):
@@ -641,7 +811,7 @@ def func_to_container_op(func, output_component_file=None, base_image: str = Non
         Once called with the required arguments, the factory constructs a pipeline task instance (ContainerOp) that can run the original function in a container.
     '''
 
-    component_spec = _func_to_component_spec(
+    component_spec = _func_to_component_spec_cached(
         func=func,
         extra_code=extra_code,
         base_image=base_image,
@@ -652,21 +822,41 @@ def func_to_container_op(func, output_component_file=None, base_image: str = Non
 
     output_component_file = output_component_file or getattr(func, '_component_target_component_file', None)
     if output_component_file:
-        component_dict = component_spec.to_dict()
-        component_yaml = dump_yaml(component_dict)
-        Path(output_component_file).write_text(component_yaml)
+        _write_component_spec_to_file(component_spec, output_component_file)
         #TODO: assert ComponentSpec.from_dict(load_yaml(output_component_file)) == component_spec
 
     return _create_task_factory_from_component_spec(component_spec)
 
 
+# sys.stdlib_module_names is only available in python 3.10+. Older versions fall back to the module spec lookup below.
+_stdlib_top_level_module_names = frozenset(getattr(sys, 'stdlib_module_names', ())) | frozenset(sys.builtin_module_names)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_std_lib_dir() -> str:
+    return os.path.normpath(sysconfig.get_paths()['stdlib'])
+
+
+@functools.lru_cache(maxsize=None)
 def _module_is_builtin_or_standard(module_name: str) -> bool:
-    import sys
-    if module_name in sys.builtin_module_names:
+    top_level_module_name = module_name.partition('.')[0]
+    if top_level_module_name in _stdlib_top_level_module_names:
         return True
-    import distutils.sysconfig as sysconfig
-    import os
-    std_lib_dir = sysconfig.get_python_lib(standard_lib=True)
-    module_name_parts = module_name.split('.')
-    expected_module_path = os.path.join(std_lib_dir, *module_name_parts)
-    return os.path.exists(expected_module_path) or os.path.exists(expected_module_path + '.py')
+    # Only looking up the top-level module, since finding a submodule imports its parent packages
+    try:
+        spec = importlib.util.find_spec(top_level_module_name)
+    except (ImportError, ValueError): # ValueError is raised for modules with __spec__ set to None (e.g. __main__)
+        return False
+    if spec is None:
+        return False
+    if spec.origin in ('built-in', 'frozen'):
+        return True
+    if not spec.has_location: # E.g. namespace packages
+        return False
+    std_lib_dir = _get_std_lib_dir()
+    module_path = os.path.normpath(spec.origin)
+    if not module_path.startswith(std_lib_dir + os.sep):
+        return False
+    # The installed packages can be located inside the standard library directory
+    module_path_parts = module_path[len(std_lib_dir):].split(os.sep)
+    return 'site-packages' not in module_path_parts and 'dist-packages' not in module_path_parts
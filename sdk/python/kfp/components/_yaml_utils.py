@@ -14,43 +14,56 @@
 import yaml
 from collections import OrderedDict
 
+try:
+    from yaml import CSafeLoader as _SafeLoader # Uses the libyaml parser which is much faster than the pure python one
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+try:
+    from yaml import CDumper as _Dumper # Uses the libyaml emitter which is much faster than the pure python one
+except ImportError:
+    from yaml import Dumper as _Dumper
+
+#See https://stackoverflow.com/questions/5121931/in-python-how-can-you-load-yaml-mappings-as-ordereddicts/21912744#21912744
+#The loader class is created once instead of on every load_yaml call.
+class _OrderedLoader(_SafeLoader):
+    pass
+
+def _construct_ordered_mapping(loader, node):
+    loader.flatten_mapping(node)
+    return OrderedDict(loader.construct_pairs(node))
+
+_OrderedLoader.add_constructor(
+    yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
+    _construct_ordered_mapping)
+
 def load_yaml(stream):
     #!!! Yaml should only be loaded using this function. Otherwise the dict ordering may be broken in Python versions prior to 3.6
-    #See https://stackoverflow.com/questions/5121931/in-python-how-can-you-load-yaml-mappings-as-ordereddicts/21912744#21912744
-
-    def ordered_load(stream, Loader=yaml.SafeLoader, object_pairs_hook=OrderedDict):
-        class OrderedLoader(Loader):
-            pass
-        def construct_mapping(loader, node):
-            loader.flatten_mapping(node)
-            return object_pairs_hook(loader.construct_pairs(node))
-        OrderedLoader.add_constructor(
-            yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
-            construct_mapping)
-        return yaml.load(stream, OrderedLoader)
-    return ordered_load(stream)
-
-def dump_yaml(data):
-    #See https://stackoverflow.com/questions/5121931/in-python-how-can-you-load-yaml-mappings-as-ordereddicts/21912744#21912744
-
-    def ordered_dump(data, stream=None, Dumper=yaml.Dumper, **kwds):
-        class OrderedDumper(Dumper):
-            pass
-        def _dict_representer(dumper, data):
-            return dumper.represent_mapping(
-                yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
-                data.items())
-        OrderedDumper.add_representer(OrderedDict, _dict_representer)
-
-        #Hack to force the code (multi-line string) to be output using the '|' style.
-        def represent_str_or_text(self, data):
-            style = None
-            if data.find('\n') >= 0: #Multiple lines
-                #print('Switching style for multiline text:' + data)
-                style = '|'
-            return self.represent_scalar(u'tag:yaml.org,2002:str', data, style)
-    
-        OrderedDumper.add_representer(str, represent_str_or_text)   
-        
-        return yaml.dump(data, stream, OrderedDumper, **kwds)
-    return ordered_dump(data)
+    return yaml.load(stream, _OrderedLoader)
+
+#The dumper class and its representers are set up once and shared by all dump_yaml calls.
+class _OrderedDumper(_Dumper):
+    pass
+
+def _dict_representer(dumper, data):
+    return dumper.represent_mapping(
+        yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
+        data.items())
+
+_OrderedDumper.add_representer(OrderedDict, _dict_representer)
+
+#Hack to force the code (multi-line string) to be output using the '|' style.
+def _represent_str_or_text(self, data):
+    style = None
+    if data.find('\n') >= 0: #Multiple lines
+        #print('Switching style for multiline text:' + data)
+        style = '|'
+    return self.represent_scalar(u'tag:yaml.org,2002:str', data, style)
+
+_OrderedDumper.add_representer(str, _represent_str_or_text)
+
+def dump_yaml(data, stream=None, encoding=None):
+    '''Dumps the data as YAML. Writes to the stream if it's specified, otherwise returns the YAML text.
+    When the encoding is specified, the YAML is produced as bytes in that encoding (the stream must be binary).
+    '''
+    return yaml.dump(data, stream, _OrderedDumper, encoding=encoding)
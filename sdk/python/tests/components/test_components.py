@@ -21,7 +21,7 @@ from pathlib import Path
 
 import kfp
 import kfp.components as comp
-from kfp.components._yaml_utils import load_yaml
+from kfp.components._yaml_utils import dump_yaml, load_yaml
 from kfp.dsl.types import InconsistentTypeException
 
 
@@ -979,6 +979,15 @@ implementation:
         with self.assertRaises(InconsistentTypeException):
             b_task = task_factory_b(in1=a_task.outputs['out1'])
 
+    def test_yaml_round_trip_of_multi_line_strings_with_trailing_spaces(self):
+        from collections import OrderedDict
+        data = OrderedDict([
+            ('code', 'def f(a):  \n    return a \n\n'),
+            ('text', 'line 1 \nline 2\t\n  line 3  '),
+            ('nested', [OrderedDict([('key', '  leading\ntrailing  \n')])]),
+        ])
+        self.assertEqual(load_yaml(dump_yaml(data)), data)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import subprocess
+import sys
 import tempfile
 import unittest
 from contextlib import contextmanager
@@ -177,10 +178,44 @@ class PythonOpTestCase(unittest.TestCase):
         with tempfile.TemporaryDirectory() as temp_dir_name:
             component_path = str(Path(temp_dir_name) / 'component.yaml')
             comp._python_op.func_to_component_file(func, output_component_file=component_path)
+            self.assertEqual(Path(component_path).read_text(), comp.func_to_component_text(func))
             op = comp.load_component_from_file(component_path)
 
         self.helper_test_2_in_1_out_component_using_local_call(func, op)
 
+    def test_func_to_component_file_keeps_existing_file_on_failure(self):
+        from unittest import mock
+        func = add_two_numbers
+        with tempfile.TemporaryDirectory() as temp_dir_name:
+            component_path = Path(temp_dir_name) / 'component.yaml'
+            component_path.write_text('old content')
+            with mock.patch.object(comp._python_op, 'dump_yaml', side_effect=RuntimeError('Emitter failure')):
+                with self.assertRaises(RuntimeError):
+                    comp._python_op.func_to_component_file(func, output_component_file=str(component_path))
+            self.assertEqual(component_path.read_text(), 'old content')
+            self.assertEqual(list(Path(temp_dir_name).iterdir()), [component_path])
+
+    def test_func_to_component_file_accepts_path_objects(self):
+        func = add_two_numbers
+        with tempfile.TemporaryDirectory() as temp_dir_name:
+            component_path = Path(temp_dir_name) / 'component.yaml'
+            comp._python_op.func_to_component_file(func, output_component_file=component_path)
+            self.assertEqual(component_path.read_text(), comp.func_to_component_text(func))
+
+    def test_func_to_component_file_writes_through_symlinks(self):
+        func = add_two_numbers
+        with tempfile.TemporaryDirectory() as temp_dir_name:
+            target_path = Path(temp_dir_name) / 'component.yaml'
+            target_path.write_text('old content')
+            link_path = Path(temp_dir_name) / 'link.yaml'
+            try:
+                link_path.symlink_to(target_path)
+            except (OSError, NotImplementedError):
+                self.skipTest('Symbolic links are not supported')
+            comp._python_op.func_to_component_file(func, output_component_file=str(link_path))
+            self.assertTrue(link_path.is_symlink())
+            self.assertEqual(target_path.read_text(), comp.func_to_component_text(func))
+
     def test_indented_func_to_container_op_local_call(self):
         def add_two_numbers_indented(a: float, b: float) -> float:
             '''Returns sum of two arguments'''
@@ -242,6 +277,26 @@ class PythonOpTestCase(unittest.TestCase):
 
         self.helper_test_2_in_1_out_component_using_local_call(func, op)
 
+    def test_capturing_function_code_using_cloudpickle_from_multiple_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from kfp.components import _python_op
+        from .test_data.module1 import module_func_with_deps as module1_func_with_deps
+        modules_to_capture = ['tests.components.test_data.module1']
+
+        expected_code = _python_op._capture_function_code_using_cloudpickle(module1_func_with_deps, modules_to_capture)
+        old_switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6) # Switching threads often makes the captures interleave
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                codes = list(executor.map(
+                    lambda _: _python_op._capture_function_code_using_cloudpickle(module1_func_with_deps, modules_to_capture),
+                    range(64),
+                ))
+        finally:
+            sys.setswitchinterval(old_switch_interval)
+        for code in codes:
+            self.assertEqual(code, expected_code)
+
     def test_func_to_container_op_with_imported_func2(self):
         from .test_data.module2_which_depends_on_module1 import module2_func_with_deps as module2_func_with_deps
         func = module2_func_with_deps
@@ -727,6 +782,143 @@ class PythonOpTestCase(unittest.TestCase):
             self.helper_test_component_using_local_call(task_factory2, arguments={}, expected_output_values={})
 
 
+    def test_capturing_function_source_code_is_cached(self):
+        from unittest import mock
+        from kfp.components import _python_op
+
+        def make_func():
+            def produce_value(a: float) -> float:
+                return a * 2
+            return produce_value
+
+        with mock.patch.object(_python_op, '_read_function_source_code', wraps=_python_op._read_function_source_code) as read_function_source_code:
+            func_code1 = _python_op._capture_function_code_using_source_copy(make_func())
+            func_code2 = _python_op._capture_function_code_using_source_copy(make_func())
+        self.assertIn('def produce_value(a: float) -> float:', func_code1)
+        self.assertEqual(func_code1, func_code2)
+        self.assertEqual(read_function_source_code.call_count, 1)
+
+    def test_capturing_function_source_code_with_reused_pseudo_file_name(self):
+        import linecache
+        from kfp.components import _python_op
+
+        # Notebooks register the cell source in linecache under a pseudo file name that can be reused for a different source
+        cell_file_name = '<kfp-test-cell-1>'
+
+        def execute_cell(source):
+            linecache.cache[cell_file_name] = (len(source), None, source.splitlines(True), cell_file_name)
+            namespace = {}
+            exec(compile(source, cell_file_name, 'exec'), namespace)
+            return namespace['produce_value']
+
+        try:
+            func1 = execute_cell('def produce_value(a: float) -> float:\n    return a * 2\n')
+            self.assertIn('return a * 2', _python_op._capture_function_code_using_source_copy(func1))
+
+            func2 = execute_cell('def produce_value(a: float) -> float:\n    return a * 3 + 1\n')
+            self.assertIn('return a * 3 + 1', _python_op._capture_function_code_using_source_copy(func2))
+        finally:
+            linecache.cache.pop(cell_file_name, None)
+
+    def test_capturing_function_source_code_reads_the_edited_file_again(self):
+        import importlib.util
+        import os
+        from kfp.components import _python_op
+
+        def load_func(module_path):
+            spec = importlib.util.spec_from_file_location('edited_module', module_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module.produce_value
+
+        with tempfile.TemporaryDirectory() as temp_dir_name:
+            module_path = str(Path(temp_dir_name) / 'edited_module.py')
+            Path(module_path).write_text('def produce_value(a: float) -> float:\n    return a * 2\n')
+            func_code1 = _python_op._capture_function_code_using_source_copy(load_func(module_path))
+            self.assertIn('return a * 2', func_code1)
+
+            Path(module_path).write_text('def produce_value(a: float) -> float:\n    return a * 3 + 1\n')
+            file_stat = os.stat(module_path)
+            os.utime(module_path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 1000000000))
+            func_code2 = _python_op._capture_function_code_using_source_copy(load_func(module_path))
+            self.assertIn('return a * 3 + 1', func_code2)
+
+            cached_locations = [location for location in _python_op._function_source_code_cache if location[0] == module_path]
+            self.assertEqual(len(cached_locations), 1)
+
+    def test_func_to_container_op_reuses_component_spec(self):
+        def my_func(a: float) -> float:
+            return a * 2
+
+        from unittest import mock
+        from kfp.components import _python_op
+        with mock.patch.object(_python_op, '_func_to_component_spec', wraps=_python_op._func_to_component_spec) as func_to_component_spec:
+            op1 = comp.func_to_container_op(my_func)
+            op2 = comp.func_to_container_op(my_func)
+        self.assertEqual(func_to_component_spec.call_count, 1)
+        self.assertEqual(op1.component_spec.to_dict(), op2.component_spec.to_dict())
+
+        op3 = comp.func_to_container_op(my_func, base_image='python:3.7')
+        self.assertIsNot(op3.component_spec, op1.component_spec)
+        self.assertEqual(op3.component_spec.implementation.container.image, 'python:3.7')
+
+        op4 = comp.func_to_container_op(my_func, use_code_pickling=True)
+        op5 = comp.func_to_container_op(my_func, use_code_pickling=True)
+        self.assertIsNot(op4.component_spec, op5.component_spec)
+
+    def test_generated_program_has_no_trailing_whitespace(self):
+        # Lines with trailing whitespace prevent the literal YAML style and make the output depend on the YAML emitter implementation
+        def func_without_outputs(a: int = 3):
+            pass
+
+        component_spec = comp.func_to_container_op(func_without_outputs).component_spec
+        program_code = component_spec.implementation.container.command[-1]
+        for line in program_code.split('\n'):
+            self.assertEqual(line, line.rstrip())
+        self.assertIn('- |\n', comp.func_to_component_text(func_without_outputs))
+
+    def test_func_to_component_text_uses_the_current_function_code_and_defaults(self):
+        def make_func_v1():
+            def produce_value(a: float, b: float = 1) -> float:
+                return a * 2 + b
+            return produce_value
+
+        def make_func_v2():
+            def produce_value(a: float, b: float = 1) -> float:
+                return a * 3 + b
+            return produce_value
+
+        func = make_func_v1()
+        self.assertIn('return a * 2 + b', comp.func_to_component_text(func))
+
+        func.__code__ = make_func_v2().__code__ # IPython autoreload updates the functions like this
+        component_text = comp.func_to_component_text(func)
+        self.assertIn('return a * 3 + b', component_text)
+        self.assertNotIn('return a * 2 + b', component_text)
+
+        func.__defaults__ = (5,)
+        component_spec = comp.func_to_container_op(func).component_spec
+        self.assertEqual(component_spec.inputs[1].default, '5')
+
+    def test_modifying_the_reused_component_spec_does_not_affect_other_components(self):
+        def my_func(a: float) -> float:
+            return a * 2
+
+        op1 = comp.func_to_container_op(my_func)
+        op1.component_spec.implementation.container.image = 'modified'
+
+        op2 = comp.func_to_container_op(my_func)
+        self.assertNotEqual(op2.component_spec.implementation.container.image, 'modified')
+        self.assertNotIn('modified', comp.func_to_component_text(my_func))
+
+    def test_module_is_builtin_or_standard(self):
+        from kfp.components._python_op import _module_is_builtin_or_standard
+
+        for module_name in ['sys', 'os', 'os.path', 'json.decoder', 'typing']:
+            self.assertTrue(_module_is_builtin_or_standard(module_name), module_name)
+        for module_name in ['kfp', 'kfp.components._data_passing', 'yaml', '__main__', 'non_existing_module']:
+            self.assertFalse(_module_is_builtin_or_standard(module_name), module_name)
+
     def test_end_to_end_python_component_pipeline_compilation(self):
         import kfp.components as comp
 